@@ -1,15 +1,95 @@
-from typing import Dict, Any, Optional, List
-import json
+from typing import Dict, Any, Optional, List, AsyncIterator, Awaitable, Callable, Tuple
+from collections import OrderedDict
+import os
+import copy
+import time
 import asyncio
+import hashlib
 from datetime import datetime
 import traceback
 import random
 
+import httpx
+
 # Import evaluator config
 try:
-    from .evaluator_config import get_mode_config
+    from .evaluator_config import get_mode_config, get_all_modes
 except ImportError:
-    from backend.evaluator_config import get_mode_config
+    from backend.evaluator_config import get_mode_config, get_all_modes
+
+# Memoized AI evaluations, keyed by a hash of the inputs, evicted LRU-first and after a TTL
+_CACHE_MAXSIZE = 1024
+_CACHE_TTL = 300.0  # seconds
+_result_cache: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+def _cache_key(*parts: str) -> bytes:
+    """Hash the inputs of a call into a compact cache key"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.digest()
+
+def _cache_get(key: bytes) -> Optional[Dict[str, Any]]:
+    """Return a copy of a fresh cached result, or None"""
+    entry = _result_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, result = entry
+    if time.monotonic() - stored_at > _CACHE_TTL:
+        del _result_cache[key]
+        return None
+    _result_cache.move_to_end(key)
+    # Callers mutate the result (e.g. RubricEvaluator), so never hand out the cached object
+    result = copy.deepcopy(result)
+    # The result is reused, but this evaluation happens now (it is saved to history with this time)
+    if "timestamp" in result:
+        result["timestamp"] = datetime.now().isoformat()
+    return result
+
+def _cache_put(key: bytes, result: Dict[str, Any]) -> None:
+    """Store a copy of a result, evicting the least recently used entry when full"""
+    _result_cache[key] = (time.monotonic(), copy.deepcopy(result))
+    _result_cache.move_to_end(key)
+    if len(_result_cache) > _CACHE_MAXSIZE:
+        _result_cache.popitem(last=False)
+
+def cache_clear() -> None:
+    """Drop all memoized AI results"""
+    _result_cache.clear()
+
+# One HTTP client for the whole process, so calls to the model API reuse pooled
+# (HTTP/2) connections instead of paying a TCP + TLS handshake each time
+AI_HTTP_TIMEOUT = 60.0  # seconds
+_http_client: Optional[httpx.AsyncClient] = None
+
+def open_http_client() -> httpx.AsyncClient:
+    """Create the shared model API client, if it doesn't exist already"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=AI_HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _http_client
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared model API client, creating it on first use"""
+    return open_http_client()
+
+async def close_http_client() -> None:
+    """Close the shared model API client and its pooled connections"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+async def _simulate_latency(default: float) -> None:
+    """Sleep to mimic model latency. AI_MOCK_LATENCY overrides the delay in seconds; 0 disables it."""
+    delay = float(os.getenv("AI_MOCK_LATENCY", default))
+    if delay > 0:
+        await asyncio.sleep(delay)
 
 async def evaluate_essay_with_ibm_ai(essay_text: str, prompt_text: str) -> Dict[str, Any]:
     """Existing essay evaluation (backward compatibility)"""
@@ -19,6 +99,23 @@ async def evaluate_resume_with_ai(resume_text: str, job_description: str) -> Dic
     """Evaluate a resume against a job description"""
     return await _mock_ai_evaluation("resume", {"resume_text": resume_text, "job_description": job_description})
 
+# Interview feedback per score: (key, strengths for scores >= 8 and >= 7, improvement below that)
+_FEEDBACK_THRESHOLDS = (8, 7)
+_INTERVIEW_FEEDBACK = (
+    ("clarity",
+     ("Clear and well-structured response", "Generally clear communication"),
+     "Work on structuring your response more clearly"),
+    ("relevance",
+     ("Directly addresses the question with relevant examples", "Response is mostly on-topic"),
+     "Ensure your answer directly addresses all parts of the question"),
+    ("accuracy",
+     ("Demonstrates strong technical knowledge", "Shows good understanding of the topic"),
+     "Add more specific technical details or examples"),
+    ("confidence",
+     ("Professional and confident delivery", "Maintains professional tone"),
+     "Use more assertive language to convey confidence"),
+)
+
 async def evaluate_interview_with_ai(answer: str, question: str, job_description: str, job_role: str) -> Dict[str, Any]:
     """
     Evaluate an interview answer using the AI Interview Engine specification.
@@ -44,53 +141,30 @@ async def evaluate_interview_with_ai(answer: str, question: str, job_description
       "sample_improved_answer": "improved version"
     }
     """
-    await asyncio.sleep(2.0)  # Simulate AI processing
+    await _simulate_latency(2.0)  # Simulate AI processing
     
     # Generate realistic scores (60-95% range)
-    clarity_score = round(random.uniform(6, 9.5), 1)
-    relevance_score = round(random.uniform(6, 9.5), 1)
-    accuracy_score = round(random.uniform(6, 9.5), 1)
-    confidence_score = round(random.uniform(6, 9.5), 1)
+    uniform = random.uniform
+    scores = {key: round(uniform(6, 9.5), 1) for key, _, _ in _INTERVIEW_FEEDBACK}
     
     # Calculate overall score (out of 100)
-    total_out_of_40 = clarity_score + relevance_score + accuracy_score + confidence_score
+    total_out_of_40 = sum(scores.values())
     overall_score = round((total_out_of_40 / 40) * 100, 1)
     
     # Generate contextual feedback
     strengths = []
     improvements = []
     
-    # Clarity feedback
-    if clarity_score >= 8:
-        strengths.append("Clear and well-structured response")
-    elif clarity_score >= 7:
-        strengths.append("Generally clear communication")
-    else:
-        improvements.append("Work on structuring your response more clearly")
-    
-    # Relevance feedback
-    if relevance_score >= 8:
-        strengths.append("Directly addresses the question with relevant examples")
-    elif relevance_score >= 7:
-        strengths.append("Response is mostly on-topic")
-    else:
-        improvements.append("Ensure your answer directly addresses all parts of the question")
-    
-    # Accuracy feedback
-    if accuracy_score >= 8:
-        strengths.append("Demonstrates strong technical knowledge")
-    elif accuracy_score >= 7:
-        strengths.append("Shows good understanding of the topic")
-    else:
-        improvements.append("Add more specific technical details or examples")
-    
-    # Confidence feedback
-    if confidence_score >= 8:
-        strengths.append("Professional and confident delivery")
-    elif confidence_score >= 7:
-        strengths.append("Maintains professional tone")
-    else:
-        improvements.append("Use more assertive language to convey confidence")
+    for key, strength_messages, improvement_message in _INTERVIEW_FEEDBACK:
+        score = scores[key]
+        message = next(
+            (msg for threshold, msg in zip(_FEEDBACK_THRESHOLDS, strength_messages) if score >= threshold),
+            None
+        )
+        if message:
+            strengths.append(message)
+        else:
+            improvements.append(improvement_message)
     
     # Add general improvements if needed
     if overall_score < 80:
@@ -105,12 +179,7 @@ async def evaluate_interview_with_ai(answer: str, question: str, job_description
     
     return {
         "mode": "answer_evaluation",
-        "scores": {
-            "clarity": clarity_score,
-            "relevance": relevance_score,
-            "accuracy": accuracy_score,
-            "confidence": confidence_score
-        },
+        "scores": scores,
         "overall_score": overall_score,
         "strengths": strengths,
         "improvements": improvements,
@@ -123,6 +192,40 @@ async def evaluate_interview_with_ai(answer: str, question: str, job_description
         }
     }
 
+# Question templates by difficulty; {role} is filled in with the job role
+_QUESTION_TEMPLATES = {
+    "easy": (
+        "Tell me about yourself and your interest in the {role} role.",
+        "What are your greatest strengths as a {role}?",
+        "Why do you want to work at this company?",
+        "Describe a time you worked well in a team.",
+        "How do you handle deadlines and pressure?",
+        "What motivates you in your work as a {role}?",
+        "Where do you see yourself in 5 years in the {role} field?",
+        "What do you know about our company and why do you want to join us?"
+    ),
+    "medium": (
+        "Tell me about a time you had to solve a difficult problem as a {role}.",
+        "How do you stay updated with the latest trends in {role} field?",
+        "Describe a situation where you had to deal with a difficult colleague/client.",
+        "What is your approach to learning new tools or technologies for {role}?",
+        "Explain a complex project you worked on recently.",
+        "How do you prioritize tasks when you have multiple deadlines?",
+        "Describe a time when you had to adapt to a significant change at work.",
+        "What strategies do you use to ensure quality in your work as a {role}?"
+    ),
+    "hard": (
+        "Describe a time you failed and how you handled the fallout.",
+        "How would you handle a situation where your project is significantly behind schedule?",
+        "What is the most challenging technical problem you've faced as a {role} and how did you resolve it?",
+        "Tell me about a time you had to make an unpopular decision for the sake of the project.",
+        "How do you approach strategic planning for a {role} function?",
+        "Describe a situation where you had to influence stakeholders without direct authority.",
+        "How would you handle a conflict between team members with different technical opinions?",
+        "What would you do if you discovered a critical flaw in a product just before launch?"
+    )
+}
+
 async def generate_interview_questions_ai(role: str, context: str, level: str, count: int = 3) -> Dict[str, Any]:
     """
     Generate tailored interview questions based on role and difficulty.
@@ -140,95 +243,182 @@ async def generate_interview_questions_ai(role: str, context: str, level: str, c
       "questions": ["Question text here", ...]
     }
     """
-    await asyncio.sleep(1.2)  # Simulate AI generation
-    
-    questions_pool = {
-        "easy": [
-            f"Tell me about yourself and your interest in the {role} role.",
-            f"What are your greatest strengths as a {role}?",
-            f"Why do you want to work at this company?",
-            f"Describe a time you worked well in a team.",
-            f"How do you handle deadlines and pressure?",
-            f"What motivates you in your work as a {role}?",
-            f"Where do you see yourself in 5 years in the {role} field?",
-            f"What do you know about our company and why do you want to join us?"
-        ],
-        "medium": [
-            f"Tell me about a time you had to solve a difficult problem as a {role}.",
-            f"How do you stay updated with the latest trends in {role} field?",
-            f"Describe a situation where you had to deal with a difficult colleague/client.",
-            f"What is your approach to learning new tools or technologies for {role}?",
-            f"Explain a complex project you worked on recently.",
-            f"How do you prioritize tasks when you have multiple deadlines?",
-            f"Describe a time when you had to adapt to a significant change at work.",
-            f"What strategies do you use to ensure quality in your work as a {role}?"
-        ],
-        "hard": [
-            f"Describe a time you failed and how you handled the fallout.",
-            f"How would you handle a situation where your project is significantly behind schedule?",
-            f"What is the most challenging technical problem you've faced as a {role} and how did you resolve it?",
-            f"Tell me about a time you had to make an unpopular decision for the sake of the project.",
-            f"How do you approach strategic planning for a {role} function?",
-            f"Describe a situation where you had to influence stakeholders without direct authority.",
-            f"How would you handle a conflict between team members with different technical opinions?",
-            f"What would you do if you discovered a critical flaw in a product just before launch?"
-        ]
-    }
+    # Not memoized: questions are sampled at random, and asking again should give a fresh set
     
+    # Hand the request to the batching worker and wait for its answer
+    start_question_worker()
+    future = asyncio.get_running_loop().create_future()
+    await _question_queue.put(((role, context, level, count), future))
+    return await future
+
+def _generate_questions(role: str, context: str, level: str, count: int) -> Dict[str, Any]:
+    """Build the question generation result for a single request"""
     # Get level-specific questions or fall back to medium
-    level_questions = questions_pool.get(level.lower(), questions_pool["medium"])
+    templates = _QUESTION_TEMPLATES.get(level.lower(), _QUESTION_TEMPLATES["medium"])
     
-    # Shuffle and pick the requested amount
-    random.shuffle(level_questions)
-    selected_questions = level_questions[:count]
+    # Pick the requested amount and only format the ones we return
+    picked = random.sample(templates, max(0, min(count, len(templates))))
+    selected_questions = [template.format(role=role) for template in picked]
     
     return {
         "mode": "question_generation",
         "questions": selected_questions
     }
 
+# Question requests are queued and served in batches by one background worker,
+# so concurrent users share a single model call instead of paying for one each
+QUESTION_BATCH_SIZE = 16
+_question_queue: Optional[asyncio.Queue] = None
+_question_worker: Optional[asyncio.Task] = None
+
+def start_question_worker() -> None:
+    """Start the question batching worker on the running loop, if it isn't running already"""
+    global _question_queue, _question_worker
+    if _question_worker is None or _question_worker.done():
+        _question_queue = asyncio.Queue()
+        _question_worker = asyncio.create_task(_run_question_worker(_question_queue))
+
+async def stop_question_worker() -> None:
+    """Cancel the question batching worker"""
+    global _question_worker
+    if _question_worker is not None:
+        _question_worker.cancel()
+        try:
+            await _question_worker
+        except asyncio.CancelledError:
+            pass
+        _question_worker = None
+
+async def _run_question_worker(queue: asyncio.Queue) -> None:
+    """Collect whatever requests are waiting (up to a batch) and answer them together"""
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < QUESTION_BATCH_SIZE and not queue.empty():
+            batch.append(queue.get_nowait())
+        
+        try:
+            await _simulate_latency(1.2)  # Simulate one AI generation call for the whole batch
+            for args, future in batch:
+                # Skip requests whose caller has gone away
+                if not future.done():
+                    future.set_result(_generate_questions(*args))
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            print(f"[ERROR] Question generation batch failed: {str(e)}")
+            traceback.print_exc()
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
 # Legacy function for backward compatibility
 async def generate_interview_questions(role: str, context: str, level: str, count: int = 3) -> List[str]:
     """Legacy wrapper - returns just the questions list"""
     result = await generate_interview_questions_ai(role, context, level, count)
     return result["questions"]
 
-async def _mock_ai_evaluation(mode: str, inputs: Dict[str, str]) -> Dict[str, Any]:
-    """Generic mock AI evaluation logic"""
+async def evaluate_batch(items: List[Dict[str, str]], concurrency: int = 8) -> List[Dict[str, Any]]:
+    """
+    Evaluate several interview answers concurrently.
+    
+    Each item holds the keyword arguments for evaluate_interview_with_ai.
+    At most `concurrency` evaluations run at once; results keep the input order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def _evaluate_one(item: Dict[str, str]) -> Dict[str, Any]:
+        async with semaphore:
+            return await evaluate_interview_with_ai(**item)
+    
+    return await asyncio.gather(*(_evaluate_one(item) for item in items))
+
+async def evaluate_stream(items: List[Dict[str, str]]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Evaluate several interview answers concurrently, yielding each result as soon as it is ready.
+    
+    Yields (index, result) pairs in completion order, where index is the item's
+    position in `items`. Pending evaluations are cancelled if the consumer stops early.
+    """
+    async def _evaluate_one(index: int, item: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        return index, await evaluate_interview_with_ai(**item)
+    
+    tasks = [asyncio.create_task(_evaluate_one(i, item)) for i, item in enumerate(items)]
     try:
-        config = get_mode_config(mode)
-        await asyncio.sleep(2.0)  # Simulate AI processing time
-        
-        scores = {}
-        total_score = 0
-        
-        for cat_key, cat_data in config["categories"].items():
-            max_val = cat_data["max_score"]
-            # Random score between 60% and 95% of max
-            score = round(random.uniform(max_val * 0.6, max_val * 0.95), 1)
-            scores[cat_key] = score
-            total_score += score
-            
-        scores["total"] = round(total_score, 1)
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def _score_category(cat_key: str, low: float, high: float, inputs: Dict[str, str]) -> float:
+    """Score a single rubric category within [low, high]"""
+    return round(random.uniform(low, high), 1)
+
+def _make_mode_evaluator(mode: str) -> Callable[[Dict[str, str]], Awaitable[Dict[str, Any]]]:
+    """
+    Build a mock evaluator specialized for one mode.
+    
+    The mode's categories, score bounds and feedback text are resolved once here
+    and captured by the returned coroutine function, so evaluating doesn't go
+    back through the config on every call.
+    """
+    categories = get_mode_config(mode)["categories"]
+    # Mock score range per category: 60%-95% of its max
+    bounds = tuple(
+        (cat_key, cat_data["max_score"] * 0.6, cat_data["max_score"] * 0.95)
+        for cat_key, cat_data in categories.items()
+    )
+    category_keys = tuple(categories)
+    feedback_messages = tuple(
+        (cat_key, f"Good performance in {cat_key} aspect.", f"Consider refining {cat_key} for better alignment.")
+        for cat_key in category_keys
+    )
+    
+    async def evaluate(inputs: Dict[str, str]) -> Dict[str, Any]:
+        # Categories are scored independently, so score them concurrently
+        category_scores = await asyncio.gather(
+            *(_score_category(cat_key, low, high, inputs) for cat_key, low, high in bounds)
+        )
+        scores = dict(zip(category_keys, category_scores))
+        scores["total"] = round(sum(category_scores), 1)
         
-        # Build evaluation response
-        evaluation_result = {
+        # Build evaluation response, with some generic feedback (RubricEvaluator handles this too)
+        return {
             "scores": scores,
             "timestamp": datetime.now().isoformat(),
             "metadata": {
                 "mode": mode,
                 "input_length": sum(len(v) for v in inputs.values() if v)
+            },
+            "feedback": {
+                cat_key: {"strengths": [strength], "improvements": [improvement]}
+                for cat_key, strength, improvement in feedback_messages
             }
         }
+    
+    return evaluate
+
+_MODE_EVALUATORS = {mode: _make_mode_evaluator(mode) for mode in get_all_modes()}
+
+async def _mock_ai_evaluation(mode: str, inputs: Dict[str, str]) -> Dict[str, Any]:
+    """Generic mock AI evaluation logic"""
+    try:
+        evaluate = _MODE_EVALUATORS.get(mode)
+        if evaluate is None:
+            raise ValueError(f"Unknown evaluation mode: {mode}")
         
-        # Add some generic feedback if needed (RubricEvaluator handles this too)
-        evaluation_result["feedback"] = {}
-        for cat_key in config["categories"]:
-            evaluation_result["feedback"][cat_key] = {
-                "strengths": [f"Good performance in {cat_key} aspect."],
-                "improvements": [f"Consider refining {cat_key} for better alignment."]
-            }
-            
+        cache_key = _cache_key(mode, *(f"{key}={value or ''}" for key, value in sorted(inputs.items())))
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        await _simulate_latency(2.0)  # Simulate AI processing time
+        
+        evaluation_result = await evaluate(inputs)
+        
+        _cache_put(cache_key, evaluation_result)
         return evaluation_result
     
     except Exception as e:
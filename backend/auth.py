@@ -1,97 +1,195 @@
-import os
-import json
+import asyncio
 import hashlib
+import hmac
+import logging
 import secrets
+import sqlite3
+import threading
 from datetime import datetime
 from typing import Optional, Dict, Any
 from pathlib import Path
 
-# User storage directory
-USERS_DIR = Path("data/users")
-USERS_DIR.mkdir(parents=True, exist_ok=True)
+import bcrypt
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# User storage: a single SQLite database
+USERS_DB = Path("data/users.db")
+USERS_DB.parent.mkdir(parents=True, exist_ok=True)
+
+# Old one-JSON-file-per-user storage, imported into the database on startup
+LEGACY_USERS_DIR = Path("data/users")
+
+# bcrypt work factor; each increment doubles the cost of hashing
+BCRYPT_ROUNDS = 12
+
+_USER_COLUMNS = ("id", "name", "email", "password", "created_at", "last_login")
+_INSERT_USER_SQL = f"INSERT INTO users ({', '.join(_USER_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)"
+_IMPORT_USER_SQL = _INSERT_USER_SQL.replace("INSERT", "INSERT OR IGNORE", 1)
+
+def _connect() -> sqlite3.Connection:
+    """Open the users database and make sure the schema exists."""
+    conn = sqlite3.connect(USERS_DB, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE COLLATE NOCASE,
+            password TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            last_login TEXT
+        )
+        """
+    )
+    conn.commit()
+    return conn
+
+# One shared connection; queries run in worker threads, so serialize access to it
+_conn = _connect()
+_conn_lock = threading.Lock()
+
+def migrate_json_users() -> int:
+    """
+    Import users from the legacy data/users/*.json files into the database.
+    
+    Users that already exist (same ID or email) are skipped, and files that can't be
+    imported are logged. The import holds the database write lock, so only one of several
+    workers starting at once does it. Afterwards the legacy directory is renamed to
+    data/users.migrated (or a timestamped name, if that exists) so it isn't imported again.
+    
+    Returns:
+        Number of users imported
+    """
+    if not LEGACY_USERS_DIR.is_dir():
+        return 0
+    
+    with _conn_lock, _conn:
+        try:
+            _conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            logger.warning("Skipping user import, another worker is running it: %s", e)
+            return 0
+        if not LEGACY_USERS_DIR.is_dir():
+            # Another worker finished the import while we waited for the lock
+            return 0
+        
+        rows = []
+        for user_file in LEGACY_USERS_DIR.glob("*.json"):
+            try:
+                with open(user_file, 'rb') as f:
+                    user_data = orjson.loads(f.read())
+                rows.append(tuple(user_data[column] for column in _USER_COLUMNS))
+            except Exception as e:
+                logger.warning("Could not import user file %s, it stays in the migrated directory: %r", user_file, e)
+                continue
+        
+        imported = _conn.executemany(_IMPORT_USER_SQL, rows).rowcount
+    
+    target = LEGACY_USERS_DIR.with_name("users.migrated")
+    if target.exists():
+        target = target.with_name(f"users.migrated.{datetime.now():%Y%m%d_%H%M%S}")
+    try:
+        LEGACY_USERS_DIR.rename(target)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        # Safe to retry on the next start; already imported users are skipped
+        logger.warning("Could not rename %s: %s", LEGACY_USERS_DIR, e)
+    return imported
+
+migrate_json_users()
 
 def hash_password(password: str) -> str:
-    """Hash a password using SHA-256 with a salt."""
-    salt = secrets.token_hex(16)
-    pwd_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"{salt}${pwd_hash}"
+    """Hash a password using bcrypt."""
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+
+def is_legacy_hash(hashed: str) -> bool:
+    """Check whether a hash uses the old salted SHA-256 format (salt$hash)."""
+    return not hashed.startswith("$2")
 
 def verify_password(password: str, hashed: str) -> bool:
-    """Verify a password against its hash."""
+    """Verify a password against its hash (bcrypt or legacy salted SHA-256)."""
     try:
-        salt, pwd_hash = hashed.split('$')
-        return hashlib.sha256((password + salt).encode()).hexdigest() == pwd_hash
+        if is_legacy_hash(hashed):
+            salt, pwd_hash = hashed.split('$')
+            return hmac.compare_digest(hashlib.sha256((password + salt).encode()).digest(), bytes.fromhex(pwd_hash))
+        return bcrypt.checkpw(password.encode(), hashed.encode())
     except:
         return False
 
-def create_user(name: str, email: str, password: str) -> Dict[str, Any]:
+def _fetch_user(column: str, value: str) -> Optional[Dict[str, Any]]:
+    """Fetch a user by one of its indexed columns (id or email)."""
+    with _conn_lock:
+        row = _conn.execute(f"SELECT * FROM users WHERE {column} = ?", (value,)).fetchone()
+    return dict(row) if row else None
+
+def _insert_user(user_data: Dict[str, Any]) -> None:
+    """Insert a new user row."""
+    with _conn_lock, _conn:
+        _conn.execute(_INSERT_USER_SQL, tuple(user_data[column] for column in _USER_COLUMNS))
+
+def _update_user(user_id: str, **fields: Any) -> None:
+    """Update the given columns of a user row."""
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+    with _conn_lock, _conn:
+        _conn.execute(f"UPDATE users SET {assignments} WHERE id = ?", (*fields.values(), user_id))
+
+async def create_user(name: str, email: str, password: str) -> Dict[str, Any]:
     """Create a new user account."""
-    # Check if user already exists
-    if get_user_by_email(email):
-        raise ValueError("User with this email already exists")
+    email = email.lower()
     
     # Generate user ID
     user_id = secrets.token_hex(16)
     
-    # Create user data
+    # Create user data (bcrypt is deliberately slow, so hash off the event loop)
     user_data = {
         "id": user_id,
         "name": name,
-        "email": email.lower(),
-        "password": hash_password(password),
+        "email": email,
+        "password": await asyncio.to_thread(hash_password, password),
         "created_at": datetime.now().isoformat(),
         "last_login": None
     }
     
-    # Save user to file
-    user_file = USERS_DIR / f"{user_id}.json"
-    with open(user_file, 'w') as f:
-        json.dump(user_data, f, indent=2)
+    # Save user; the UNIQUE email column rejects duplicates atomically
+    try:
+        await asyncio.to_thread(_insert_user, user_data)
+    except sqlite3.IntegrityError:
+        raise ValueError("User with this email already exists")
     
     return {
         "id": user_id,
         "name": name,
-        "email": email.lower()
+        "email": email
     }
 
-def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
+async def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
     """Get user by email address."""
-    email = email.lower()
-    for user_file in USERS_DIR.glob("*.json"):
-        try:
-            with open(user_file, 'r') as f:
-                user_data = json.load(f)
-                if user_data.get("email") == email:
-                    return user_data
-        except:
-            continue
-    return None
-
-def get_user_by_id(user_id: str) -> Optional[Dict[str, Any]]:
+    return await asyncio.to_thread(_fetch_user, "email", email)
+
+async def get_user_by_id(user_id: str) -> Optional[Dict[str, Any]]:
     """Get user by ID."""
-    user_file = USERS_DIR / f"{user_id}.json"
-    if user_file.exists():
-        try:
-            with open(user_file, 'r') as f:
-                return json.load(f)
-        except:
-            pass
-    return None
+    return await asyncio.to_thread(_fetch_user, "id", user_id)
 
-def authenticate_user(email: str, password: str) -> Optional[Dict[str, Any]]:
+async def authenticate_user(email: str, password: str) -> Optional[Dict[str, Any]]:
     """Authenticate a user with email and password."""
-    user = get_user_by_email(email)
+    user = await get_user_by_email(email)
     if not user:
         return None
     
-    if not verify_password(password, user["password"]):
+    if not await asyncio.to_thread(verify_password, password, user["password"]):
         return None
     
-    # Update last login
-    user["last_login"] = datetime.now().isoformat()
-    user_file = USERS_DIR / f"{user['id']}.json"
-    with open(user_file, 'w') as f:
-        json.dump(user, f, indent=2)
+    # Update last login, upgrading legacy SHA-256 hashes to bcrypt now that we have the plaintext
+    updates = {"last_login": datetime.now().isoformat()}
+    if is_legacy_hash(user["password"]):
+        updates["password"] = await asyncio.to_thread(hash_password, password)
+    await asyncio.to_thread(_update_user, user["id"], **updates)
     
     # Return user data without password
     return {
@@ -100,11 +198,6 @@ def authenticate_user(email: str, password: str) -> Optional[Dict[str, Any]]:
         "email": user["email"]
     }
 
-def update_user_session(user_id: str) -> None:
+async def update_user_session(user_id: str) -> None:
     """Update user's last login timestamp."""
-    user = get_user_by_id(user_id)
-    if user:
-        user["last_login"] = datetime.now().isoformat()
-        user_file = USERS_DIR / f"{user_id}.json"
-        with open(user_file, 'w') as f:
-            json.dump(user, f, indent=2)
+    await asyncio.to_thread(_update_user, user_id, last_login=datetime.now().isoformat())
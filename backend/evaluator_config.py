@@ -1,7 +1,8 @@
 # Evaluator Configuration Module
 # Centralized configuration for all evaluation modes
 
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, NamedTuple, Tuple
 
 EVALUATION_MODES = {
     "resume": {
@@ -45,6 +46,37 @@ EVALUATION_MODES = {
 }
 
 
+# Max score per category for every mode, computed once since the config is static
+_MAX_SCORES = {
+    mode: {key: cat["max_score"] for key, cat in config["categories"].items()}
+    for mode, config in EVALUATION_MODES.items()
+}
+
+
+class CategorySpec(NamedTuple):
+    """Scoring data for one rubric category."""
+    key: str
+    name: str
+    max_score: int
+
+
+class ModeSpec(NamedTuple):
+    """Immutable scoring view of a mode: its display name and categories in rubric order."""
+    name: str
+    categories: Tuple[CategorySpec, ...]
+
+
+# Frozen scoring specs for the hot formatting path (attribute access instead of dict lookups)
+_MODE_SPECS = {
+    mode: ModeSpec(
+        name=config["name"],
+        categories=tuple(CategorySpec(key, cat["name"], cat["max_score"]) for key, cat in config["categories"].items()),
+    )
+    for mode, config in EVALUATION_MODES.items()
+}
+
+
+@lru_cache(maxsize=8)
 def get_mode_config(mode: str) -> Dict[str, Any]:
     """Get configuration for a specific evaluation mode."""
     if mode not in EVALUATION_MODES:
@@ -52,11 +84,20 @@ def get_mode_config(mode: str) -> Dict[str, Any]:
     return EVALUATION_MODES[mode]
 
 
+def get_mode_spec(mode: str) -> ModeSpec:
+    """Get the frozen scoring spec for a specific evaluation mode."""
+    if mode not in _MODE_SPECS:
+        raise ValueError(f"Unknown evaluation mode: {mode}")
+    return _MODE_SPECS[mode]
+
+
+@lru_cache(maxsize=None)
 def get_all_modes() -> Dict[str, Dict[str, Any]]:
     """Get all available evaluation modes."""
     return EVALUATION_MODES
 
 
+@lru_cache(maxsize=8)
 def get_categories_for_mode(mode: str) -> Dict[str, Dict[str, Any]]:
     """Get category configuration for a specific mode."""
     config = get_mode_config(mode)
@@ -65,5 +106,6 @@ def get_categories_for_mode(mode: str) -> Dict[str, Dict[str, Any]]:
 
 def get_max_scores_for_mode(mode: str) -> Dict[str, int]:
     """Get max scores for each category in a mode."""
-    categories = get_categories_for_mode(mode)
-    return {key: cat["max_score"] for key, cat in categories.items()}
+    if mode not in _MAX_SCORES:
+        raise ValueError(f"Unknown evaluation mode: {mode}")
+    return _MAX_SCORES[mode]
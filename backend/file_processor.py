@@ -2,56 +2,157 @@
 # Handles PDF and Word document uploads for Resume Evaluator
 
 import os
-from typing import Tuple, Optional
+import asyncio
+import itertools
+import threading
+import zipfile
+from typing import BinaryIO, Tuple, Optional
 import traceback
 
+from fastapi import HTTPException, UploadFile
 
-async def extract_text_from_pdf(file_content: bytes) -> str:
+# Optional document parsers, imported once; missing ones are reported when first needed
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# PDFium is not thread-safe, and extraction runs in worker threads, so only one
+# thread may be inside pypdfium2 at a time
+_PDFIUM_LOCK = threading.Lock()
+
+try:
+    from PyPDF2 import PdfReader
+except ImportError:
+    PdfReader = None
+
+try:
+    from docx import Document
+except ImportError:
+    Document = None
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+if etree is not None:
+    _WORD_NS = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+    # Never resolve entities or fetch anything while parsing uploaded XML
+    _XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+    _W_PARAGRAPHS = etree.XPath("//w:body//w:p", namespaces=_WORD_NS)
+    # Text-bearing run content, in document order: text, tabs, line breaks, hyphens
+    _W_RUN_CONTENT = etree.XPath(
+        "(./w:r | ./w:hyperlink/w:r)/*[self::w:t or self::w:tab or self::w:ptab"
+        " or self::w:br or self::w:cr or self::w:noBreakHyphen]",
+        namespaces=_WORD_NS,
+    )
+    _W_T = f"{{{_WORD_NS['w']}}}t"
+    _W_BR = f"{{{_WORD_NS['w']}}}br"
+    _W_TYPE = f"{{{_WORD_NS['w']}}}type"
+    # Same text equivalents as python-docx
+    _W_RUN_CHARS = {
+        f"{{{_WORD_NS['w']}}}tab": "\t",
+        f"{{{_WORD_NS['w']}}}ptab": "\t",
+        f"{{{_WORD_NS['w']}}}cr": "\n",
+        f"{{{_WORD_NS['w']}}}noBreakHyphen": "-",
+    }
+
+
+def _run_content_text(element) -> str:
+    """Text equivalent of one run content element; page and column breaks have none."""
+    tag = element.tag
+    if tag == _W_T:
+        return element.text or ""
+    if tag == _W_BR:
+        return "\n" if element.get(_W_TYPE, "textWrapping") == "textWrapping" else ""
+    return _W_RUN_CHARS[tag]
+
+
+def _extract_pdf_sync(file: BinaryIO) -> str:
+    """Parse a PDF and return its text. CPU-bound, so run it off the event loop."""
+    if pdfium is None:
+        # Native PDFium wheels aren't available everywhere; fall back to pure-Python PyPDF2
+        return _extract_pdf_pypdf2(file)
+    
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(file)
+        try:
+            return "\n".join(
+                page_text.replace("\r\n", "\n")
+                for page in pdf
+                if (page_text := page.get_textpage().get_text_range())
+            )
+        finally:
+            pdf.close()
+
+
+def _extract_pdf_pypdf2(file: BinaryIO) -> str:
+    """Parse a PDF with PyPDF2 and return its text."""
+    if PdfReader is None:
+        raise ImportError("No PDF library is installed")
+    
+    reader = PdfReader(file)
+    
+    return "\n".join(page_text for page in reader.pages if (page_text := page.extract_text()))
+
+
+async def extract_text_from_pdf(file: BinaryIO) -> str:
     """Extract text content from a PDF file."""
     try:
-        import io
-        from PyPDF2 import PdfReader
-        
-        pdf_file = io.BytesIO(file_content)
-        reader = PdfReader(pdf_file)
-        
-        text_parts = []
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text_parts.append(page_text)
-        
-        return "\n".join(text_parts)
+        return await asyncio.to_thread(_extract_pdf_sync, file)
     except ImportError:
-        raise ImportError("PyPDF2 is required for PDF processing. Install with: pip install PyPDF2")
+        raise ImportError("pypdfium2 or PyPDF2 is required for PDF processing. Install with: pip install pypdfium2")
     except Exception as e:
         print(f"[ERROR] Failed to extract text from PDF: {str(e)}")
         traceback.print_exc()
         raise ValueError(f"Failed to process PDF file: {str(e)}")
 
 
-async def extract_text_from_docx(file_content: bytes) -> str:
+def _extract_docx_sync(file: BinaryIO) -> str:
+    """Parse a Word document and return its text. CPU-bound, so run it off the event loop."""
+    if etree is not None:
+        try:
+            with zipfile.ZipFile(file) as archive:
+                document_xml = archive.read("word/document.xml")
+        except (zipfile.BadZipFile, KeyError):
+            # Unexpected package layout; let python-docx have a go
+            document_xml = None
+        
+        if document_xml is not None:
+            root = etree.fromstring(document_xml, _XML_PARSER)
+            # One line per paragraph, in document order (table cells included)
+            paragraph_texts = ("".join(map(_run_content_text, _W_RUN_CONTENT(paragraph))) for paragraph in _W_PARAGRAPHS(root))
+            return "\n".join(text for text in paragraph_texts if text.strip())
+    
+    file.seek(0)
+    return _extract_docx_python_docx(file)
+
+
+def _extract_docx_python_docx(file: BinaryIO) -> str:
+    """Parse a Word document with python-docx and return its text."""
+    if Document is None:
+        raise ImportError("python-docx is not installed")
+    
+    doc = Document(file)
+    
+    paragraphs = (text for paragraph in doc.paragraphs if (text := paragraph.text).strip())
+    
+    # Also extract text from tables
+    table_rows = (
+        row_text
+        for table in doc.tables
+        for row in table.rows
+        if (row_text := " | ".join(text for cell in row.cells if (text := cell.text.strip())))
+    )
+    
+    return "\n".join(itertools.chain(paragraphs, table_rows))
+
+
+async def extract_text_from_docx(file: BinaryIO) -> str:
     """Extract text content from a Word document (.docx)."""
     try:
-        import io
-        from docx import Document
-        
-        docx_file = io.BytesIO(file_content)
-        doc = Document(docx_file)
-        
-        text_parts = []
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                text_parts.append(paragraph.text)
-        
-        # Also extract text from tables
-        for table in doc.tables:
-            for row in table.rows:
-                row_text = " | ".join(cell.text.strip() for cell in row.cells if cell.text.strip())
-                if row_text:
-                    text_parts.append(row_text)
-        
-        return "\n".join(text_parts)
+        return await asyncio.to_thread(_extract_docx_sync, file)
     except ImportError:
         raise ImportError("python-docx is required for Word document processing. Install with: pip install python-docx")
     except Exception as e:
@@ -60,33 +161,115 @@ async def extract_text_from_docx(file_content: bytes) -> str:
         raise ValueError(f"Failed to process Word document: {str(e)}")
 
 
-async def process_resume_file(filename: str, file_content: bytes) -> Tuple[str, str]:
+# Extension -> (extractor, file type) for supported resume formats
+_EXT_DISPATCH = {
+    ".pdf": (extract_text_from_pdf, "pdf"),
+    ".docx": (extract_text_from_docx, "docx"),
+}
+
+
+async def process_resume_file(filename: str, file: BinaryIO) -> Tuple[str, str]:
     """
     Process uploaded resume file and extract text.
     
     Args:
         filename: Original filename with extension
-        file_content: Binary content of the file
+        file: Binary file object positioned at the start of the content
         
     Returns:
         Tuple of (extracted_text, file_type)
     """
-    if not filename or not file_content:
+    if not filename or not file or file.seek(0, os.SEEK_END) == 0:
         raise ValueError("No file provided")
+    file.seek(0)
     
-    # Get file extension
-    _, ext = os.path.splitext(filename.lower())
-    
-    if ext == ".pdf":
-        text = await extract_text_from_pdf(file_content)
-        return text, "pdf"
-    elif ext in [".docx", ".doc"]:
-        if ext == ".doc":
-            raise ValueError("Legacy .doc format is not supported. Please convert to .docx or PDF.")
-        text = await extract_text_from_docx(file_content)
-        return text, "docx"
-    else:
+    # Get file extension (only the extension needs lowercasing)
+    ext = os.path.splitext(filename)[1].lower()
+    
+    if ext == ".doc":
+        raise ValueError("Legacy .doc format is not supported. Please convert to .docx or PDF.")
+    
+    handler = _EXT_DISPATCH.get(ext)
+    if handler is None:
         raise ValueError(f"Unsupported file format: {ext}. Please upload a PDF or Word document (.docx)")
+    
+    extract, file_type = handler
+    text = await extract(file)
+    return text, file_type
+
+
+MAX_UPLOAD_SIZE_MB = 5
+# Room for the other form fields (e.g. the job description) and multipart framing
+UPLOAD_FORM_OVERHEAD = 1024 * 1024
+
+
+def _upload_too_large(max_size_mb: int = MAX_UPLOAD_SIZE_MB) -> HTTPException:
+    """The 413 error for an upload over the size limit."""
+    return HTTPException(status_code=413, detail=f"File is too large. Maximum size is {max_size_mb} MB.")
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Pure ASGI middleware capping request bodies on upload routes.
+    
+    Form data is parsed (and files spooled) before the endpoint runs, so the limit has
+    to be enforced here: a body whose Content-Length is over the limit is rejected before
+    any of it is read, and one without (or understating) it as soon as too many bytes
+    have arrived. The 413 is raised from receive(), i.e. inside the route, so the app's
+    exception handlers render it.
+    """
+    
+    def __init__(self, app, paths: Tuple[str, ...], max_size_mb: int = MAX_UPLOAD_SIZE_MB):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_size_mb = max_size_mb
+        self.max_body_size = max_size_mb * 1024 * 1024 + UPLOAD_FORM_OVERHEAD
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        
+        declared_size = next((value for name, value in scope["headers"] if name == b"content-length"), b"")
+        too_large = declared_size.isdigit() and int(declared_size) > self.max_body_size
+        received = 0
+        
+        async def limited_receive():
+            nonlocal received
+            if too_large:
+                raise _upload_too_large(self.max_size_mb)
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise _upload_too_large(self.max_size_mb)
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+
+def validate_upload(upload: UploadFile, max_size_mb: int = MAX_UPLOAD_SIZE_MB) -> BinaryIO:
+    """
+    Check an uploaded file against the size limit (UploadSizeLimitMiddleware only bounds
+    the whole request body) and return its file object for reading.
+    
+    Starlette has already spooled the upload to a temporary file, so this reads it in
+    place instead of copying it.
+    
+    Args:
+        upload: The uploaded file
+        max_size_mb: Maximum allowed size in megabytes
+        
+    Returns:
+        The upload's file object, rewound to the start
+    """
+    file = upload.file
+    size = upload.size if upload.size is not None else file.seek(0, os.SEEK_END)
+    if size > max_size_mb * 1024 * 1024:
+        raise _upload_too_large(max_size_mb)
+    
+    file.seek(0)
+    return file
 
 
 def validate_file_size(file_content: bytes, max_size_mb: int = 5) -> bool:
@@ -97,4 +280,4 @@ def validate_file_size(file_content: bytes, max_size_mb: int = 5) -> bool:
 
 def get_allowed_extensions() -> list:
     """Get list of allowed file extensions for resume upload."""
-    return [".pdf", ".docx"]
+    return list(_EXT_DISPATCH)
@@ -1,15 +1,17 @@
 import os
 import sys
 import traceback
+import asyncio
 import json
+from collections import OrderedDict
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 
-from fastapi import FastAPI, Request, Form, Cookie, Depends, HTTPException, File, UploadFile
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, Request, Form, Cookie, Depends, HTTPException, File, UploadFile, BackgroundTasks
+from fastapi.responses import HTMLResponse, RedirectResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from starlette.middleware.sessions import SessionMiddleware
+from jinja2 import FileSystemBytecodeCache
 import uvicorn
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
@@ -17,74 +19,147 @@ import time
 
 # Import your backend modules
 try:
-    from .session import create_session_id, get_session_id
+    from .session import create_session_id, get_session_id, PureASGISessionMiddleware
     from .ai_engine import evaluate_resume_with_ai, evaluate_interview_with_ai, generate_interview_questions_ai
+    from .ai_engine import start_question_worker, stop_question_worker, open_http_client, close_http_client
     from .storage import save_evaluation, get_user_history
     from .rubric_evaluator import RubricEvaluator
-    from .file_processor import process_resume_file
+    from .file_processor import process_resume_file, validate_upload, UploadSizeLimitMiddleware
     from .evaluator_config import get_all_modes, get_mode_config
     from .auth import create_user, authenticate_user, get_user_by_id
 except ImportError:
-    from backend.session import create_session_id, get_session_id
+    from backend.session import create_session_id, get_session_id, PureASGISessionMiddleware
     from backend.ai_engine import evaluate_resume_with_ai, evaluate_interview_with_ai, generate_interview_questions_ai
+    from backend.ai_engine import start_question_worker, stop_question_worker, open_http_client, close_http_client
     from backend.storage import save_evaluation, get_user_history
     from backend.rubric_evaluator import RubricEvaluator
-    from backend.file_processor import process_resume_file
+    from backend.file_processor import process_resume_file, validate_upload, UploadSizeLimitMiddleware
     from backend.evaluator_config import get_all_modes, get_mode_config
     from backend.auth import create_user, authenticate_user, get_user_by_id
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Shown in every page footer; refreshed at New Year by a background task
+_CURRENT_YEAR = datetime.now().year
+
+async def _refresh_current_year():
+    """Keep _CURRENT_YEAR up to date, waking up once a year at midnight on Jan 1."""
+    global _CURRENT_YEAR
+    while True:
+        now = datetime.now()
+        await asyncio.sleep((datetime(now.year + 1, 1, 1) - now).total_seconds())
+        _CURRENT_YEAR = datetime.now().year
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("[INFO] Server starting up...")
+    app.state.http_client = open_http_client()
+    start_question_worker()
+    year_task = asyncio.create_task(_refresh_current_year())
+    # Compile every template now so the first request doesn't pay for it
+    for template_name in templates.env.list_templates(extensions=["html"]):
+        templates.env.get_template(template_name)
     yield
+    year_task.cancel()
+    await stop_question_worker()
+    await close_http_client()
     print("[INFO] Server shutting down...")
 
-app = FastAPI(title="Resume & Interview Skills Evaluator", lifespan=lifespan)
+app = FastAPI(
+    title="Resume & Interview Skills Evaluator",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # Add session middleware
 app.add_middleware(
-    SessionMiddleware,
+    PureASGISessionMiddleware,
     secret_key=os.getenv("SESSION_SECRET_KEY", "dev-secret-key-change-me"),
     max_age=7 * 24 * 60 * 60,  # 7 days
 )
 
-# Templates and static directory setup
-templates = Jinja2Templates(directory="templates")
+# Cap resume uploads before their form data is parsed
+app.add_middleware(UploadSizeLimitMiddleware, paths=("/evaluate/resume",))
+
+# Templates and static directory setup; compiled templates are kept in memory and
+# their bytecode on disk, so restarts skip the parse/compile step too
+os.makedirs("data/jinja_cache", exist_ok=True)
+templates = Jinja2Templates(
+    directory="templates",
+    bytecode_cache=FileSystemBytecodeCache("data/jinja_cache"),
+    auto_reload=False,
+    cache_size=400,
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Ensure the directory for storing session data exists
-os.makedirs("data/sessions", exist_ok=True)
-
-# Helper to provide current year to all templates
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    response = await call_next(request)
-    return response
+# Recently looked-up users, so back-to-back requests don't each hit the database
+USER_CACHE_TTL = 30  # seconds
+USER_CACHE_MAXSIZE = 1024
+_user_cache: Dict[str, Tuple[float, dict]] = {}
 
 # Authentication dependency
-def get_current_user(request: Request) -> Optional[dict]:
+async def get_current_user(request: Request) -> Optional[dict]:
     """Get current logged-in user from session."""
     user_id = request.session.get("user_id")
-    if user_id:
-        return get_user_by_id(user_id)
-    return None
+    if not user_id:
+        return None
+    
+    now = time.monotonic()
+    cached = _user_cache.get(user_id)
+    if cached and now - cached[0] < USER_CACHE_TTL:
+        return cached[1]
+    
+    user = await get_user_by_id(user_id)
+    if user:
+        if len(_user_cache) >= USER_CACHE_MAXSIZE:
+            # Drop expired entries so the cache doesn't grow without bound
+            for key in [key for key, (cached_at, _) in _user_cache.items() if now - cached_at >= USER_CACHE_TTL]:
+                del _user_cache[key]
+        _user_cache[user_id] = (now, user)
+    else:
+        _user_cache.pop(user_id, None)
+    return user
 
-def require_auth(request: Request):
+async def require_auth(request: Request):
     """Require authentication for a route."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Authentication required")
     return user
 
+# Rendered HTML for pages whose output only depends on the year, base URL, user and title
+STATIC_PAGE_CACHE_SIZE = 64
+_static_pages: "OrderedDict[tuple, str]" = OrderedDict()
+
+def render_static(template_name: str, context: dict) -> HTMLResponse:
+    """Render a page that has no per-request state (e.g. no error message), reusing cached HTML."""
+    user = context["user"]
+    key = (
+        template_name,
+        context["current_year"],
+        str(context["request"].base_url),
+        user["name"] if user else None,
+        context["page_title"],
+    )
+    html = _static_pages.get(key)
+    if html is None:
+        html = templates.env.get_template(template_name).render(context)
+        _static_pages[key] = html
+        if len(_static_pages) > STATIC_PAGE_CACHE_SIZE:
+            _static_pages.popitem(last=False)
+    else:
+        _static_pages.move_to_end(key)
+    return HTMLResponse(html)
+
 # Standard context for templates
-def get_base_context(request: Request):
-    user = get_current_user(request)
+async def get_base_context(request: Request):
+    user = await get_current_user(request)
     return {
         "request": request,
-        "current_year": datetime.now().year,
+        "current_year": _CURRENT_YEAR,
         "modes": get_all_modes(),
         "user": user
     }
@@ -92,14 +167,14 @@ def get_base_context(request: Request):
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request, session_id: Optional[str] = Cookie(None)):
     # Check if user is authenticated
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         return RedirectResponse(url="/login", status_code=302)
     
     if not session_id:
         return RedirectResponse(url="/new-session", status_code=302)
     return templates.TemplateResponse(
-        "mode_select.html", {**get_base_context(request), "page_title": "Resume & Interview Skills Evaluator"}
+        "mode_select.html", {**await get_base_context(request), "page_title": "Resume & Interview Skills Evaluator"}
     )
 
 @app.get("/new-session")
@@ -114,22 +189,20 @@ async def create_new_session():
 @app.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
     # If already logged in, redirect to home
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if user:
         return RedirectResponse(url="/", status_code=302)
     
-    return templates.TemplateResponse(
-        "login.html", {**get_base_context(request), "page_title": "Login"}
-    )
+    return render_static("login.html", {**await get_base_context(request), "page_title": "Login"})
 
 @app.post("/login", response_class=HTMLResponse)
 async def login_submit(request: Request, email: str = Form(...), password: str = Form(...)):
     try:
-        user = authenticate_user(email, password)
+        user = await authenticate_user(email, password)
         if not user:
             return templates.TemplateResponse(
                 "login.html",
-                {**get_base_context(request), "page_title": "Login", "error": "Invalid email or password"}
+                {**await get_base_context(request), "page_title": "Login", "error": "Invalid email or password"}
             )
         
         # Set user in session
@@ -140,19 +213,17 @@ async def login_submit(request: Request, email: str = Form(...), password: str =
         traceback.print_exc()
         return templates.TemplateResponse(
             "login.html",
-            {**get_base_context(request), "page_title": "Login", "error": "An error occurred during login"}
+            {**await get_base_context(request), "page_title": "Login", "error": "An error occurred during login"}
         )
 
 @app.get("/register", response_class=HTMLResponse)
 async def register_page(request: Request):
     # If already logged in, redirect to home
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if user:
         return RedirectResponse(url="/", status_code=302)
     
-    return templates.TemplateResponse(
-        "register.html", {**get_base_context(request), "page_title": "Register"}
-    )
+    return render_static("register.html", {**await get_base_context(request), "page_title": "Register"})
 
 @app.post("/register", response_class=HTMLResponse)
 async def register_submit(
@@ -167,18 +238,18 @@ async def register_submit(
         if password != confirm_password:
             return templates.TemplateResponse(
                 "register.html",
-                {**get_base_context(request), "page_title": "Register", "error": "Passwords do not match"}
+                {**await get_base_context(request), "page_title": "Register", "error": "Passwords do not match"}
             )
         
         # Validate password length
         if len(password) < 6:
             return templates.TemplateResponse(
                 "register.html",
-                {**get_base_context(request), "page_title": "Register", "error": "Password must be at least 6 characters"}
+                {**await get_base_context(request), "page_title": "Register", "error": "Password must be at least 6 characters"}
             )
         
         # Create user
-        user = create_user(name, email, password)
+        user = await create_user(name, email, password)
         
         # Set user in session
         request.session["user_id"] = user["id"]
@@ -186,14 +257,14 @@ async def register_submit(
     except ValueError as e:
         return templates.TemplateResponse(
             "register.html",
-            {**get_base_context(request), "page_title": "Register", "error": str(e)}
+            {**await get_base_context(request), "page_title": "Register", "error": str(e)}
         )
     except Exception as e:
         print(f"[ERROR] Registration failed: {str(e)}")
         traceback.print_exc()
         return templates.TemplateResponse(
             "register.html",
-            {**get_base_context(request), "page_title": "Register", "error": "An error occurred during registration"}
+            {**await get_base_context(request), "page_title": "Register", "error": "An error occurred during registration"}
         )
 
 @app.get("/logout")
@@ -205,48 +276,47 @@ async def logout(request: Request):
 
 @app.get("/resume", response_class=HTMLResponse)
 async def resume_form(request: Request):
-    return templates.TemplateResponse(
-        "resume_form.html", {**get_base_context(request), "page_title": "Resume Evaluator"}
-    )
+    return render_static("resume_form.html", {**await get_base_context(request), "page_title": "Resume Evaluator"})
 
 @app.get("/interview", response_class=HTMLResponse)
 async def interview_form(request: Request):
-    return templates.TemplateResponse(
-        "interview_form.html", {**get_base_context(request), "page_title": "Interview Evaluator"}
-    )
+    return render_static("interview_form.html", {**await get_base_context(request), "page_title": "Interview Evaluator"})
 
 # --- EVALUATION ENDPOINTS ---
 
 @app.post("/evaluate/resume", response_class=HTMLResponse)
 async def evaluate_resume_endpoint(
     request: Request,
+    background_tasks: BackgroundTasks,
     job_description: str = Form(""),
     resume_file: UploadFile = File(...),
     session_id: str = Depends(get_session_id)
 ):
     try:
-        content = await resume_file.read()
-        resume_text, file_type = await process_resume_file(resume_file.filename, content)
+        resume_text, file_type = await process_resume_file(resume_file.filename, validate_upload(resume_file))
         
         raw_eval = await evaluate_resume_with_ai(resume_text, job_description)
-        result = RubricEvaluator.format_evaluation_results(raw_eval, mode="resume")
+        result = RubricEvaluator.format_evaluation_results(raw_eval, mode="resume", copy=False)
         
-        save_evaluation(session_id, {
+        # Persist after the response has been sent
+        background_tasks.add_task(save_evaluation, session_id, {
             "mode": "resume",
             "resume_text": resume_text,
             "job_description": job_description,
             "filename": resume_file.filename,
             "evaluation": result,
-            "timestamp": result.get("timestamp", datetime.now().isoformat())
+            "timestamp": result.get("timestamp") or datetime.now().isoformat()
         })
         
         return templates.TemplateResponse("resume_results.html", {
-            **get_base_context(request),
+            **await get_base_context(request),
             "page_title": "Resume Results",
             "resume_text": resume_text,
             "job_description": job_description,
             "evaluation": result
         })
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[ERROR] Resume evaluation failed: {str(e)}")
         traceback.print_exc()
@@ -255,6 +325,7 @@ async def evaluate_resume_endpoint(
 @app.post("/evaluate/interview", response_class=HTMLResponse)
 async def evaluate_interview_endpoint(
     request: Request,
+    background_tasks: BackgroundTasks,
     question: str = Form(...),
     answer: str = Form(...),
     job_description: str = Form(""),
@@ -263,20 +334,21 @@ async def evaluate_interview_endpoint(
 ):
     try:
         raw_eval = await evaluate_interview_with_ai(answer, question, job_description, job_role)
-        result = RubricEvaluator.format_evaluation_results(raw_eval, mode="interview")
+        result = RubricEvaluator.format_evaluation_results(raw_eval, mode="interview", copy=False)
         
-        save_evaluation(session_id, {
+        # Persist after the response has been sent
+        background_tasks.add_task(save_evaluation, session_id, {
             "mode": "interview",
             "question": question,
             "answer": answer,
             "job_description": job_description,
             "job_role": job_role,
             "evaluation": result,
-            "timestamp": result.get("timestamp", datetime.now().isoformat())
+            "timestamp": result.get("timestamp") or datetime.now().isoformat()
         })
         
         return templates.TemplateResponse("interview_results.html", {
-            **get_base_context(request),
+            **await get_base_context(request),
             "page_title": "Interview Results",
             "question": question,
             "answer": answer,
@@ -289,7 +361,7 @@ async def evaluate_interview_endpoint(
 
 # --- QUESTION GENERATION ENDPOINT ---
 
-@app.post("/api/generate-questions")
+@app.post("/api/generate-questions", response_class=ORJSONResponse)
 async def generate_questions_endpoint(
     request: Request,
     job_role: str = Form(...),
@@ -312,7 +384,8 @@ async def generate_questions_endpoint(
             level=difficulty_level,
             count=number_of_questions
         )
-        return result
+        # Already plain JSON types, so hand it to orjson directly and skip jsonable_encoder
+        return ORJSONResponse(result)
     except Exception as e:
         print(f"[ERROR] Question generation failed: {str(e)}")
         traceback.print_exc()
@@ -321,8 +394,8 @@ async def generate_questions_endpoint(
 @app.get("/history", response_class=HTMLResponse)
 async def view_history(request: Request, session_id: str = Depends(get_session_id)):
     try:
-        history = get_user_history(session_id)
-        history.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
+        # get_user_history already returns entries newest first
+        history = await asyncio.to_thread(get_user_history, session_id)
     except Exception as e:
         print("[WARN] Error fetching history:", str(e))
         traceback.print_exc()
@@ -331,18 +404,24 @@ async def view_history(request: Request, session_id: str = Depends(get_session_i
     return templates.TemplateResponse(
         "history.html",
         {
-            **get_base_context(request),
+            **await get_base_context(request),
             "page_title": "Evaluation History",
             "history": history
         }
     )
 
+def wants_json(request: Request) -> bool:
+    """API routes and clients asking for JSON get JSON errors instead of the HTML error page."""
+    return request.url.path.startswith("/api/") or "application/json" in request.headers.get("accept", "")
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
+    if wants_json(request):
+        return ORJSONResponse({"detail": exc.detail, "status": exc.status_code}, status_code=exc.status_code)
     return templates.TemplateResponse(
         "error.html",
         {
-            **get_base_context(request),
+            **await get_base_context(request),
             "page_title": f"Error: {exc.status_code}",
             "status_code": exc.status_code,
             "detail": exc.detail
@@ -354,10 +433,12 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 async def general_exception_handler(request: Request, exc: Exception):
     print("[WARN] Unhandled exception:", str(exc))
     traceback.print_exc()
+    if wants_json(request):
+        return ORJSONResponse({"detail": "An unexpected error occurred.", "status": 500}, status_code=500)
     return templates.TemplateResponse(
         "error.html",
         {
-            **get_base_context(request),
+            **await get_base_context(request),
             "page_title": "Server Error",
             "status_code": 500,
             "detail": "An unexpected error occurred."
@@ -370,4 +451,12 @@ if __name__ == "__main__":
     if parent_dir not in sys.path:
         sys.path.insert(0, parent_dir)
 
-    uvicorn.run("backend.main:app", host="127.0.0.1", port=8000, reload=True)
+    # uvloop (libuv event loop) isn't available on Windows; httptools is a faster HTTP parser than h11
+    uvicorn.run(
+        "backend.main:app",
+        host="127.0.0.1",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        reload=True,
+    )
@@ -1,12 +1,23 @@
+import re
 from typing import Optional
+from base64 import b64decode, b64encode
 from fastapi import HTTPException, Cookie
-import uuid
+import os
+
+import itsdangerous
+import orjson
+from itsdangerous.exc import BadSignature
+
+# 32 hex characters, or the UUID format issued before session IDs switched to plain hex
+_SESSION_ID_RE = re.compile(
+    r"\A(?:[0-9a-f]{32}|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})\Z"
+)
 
 def create_session_id() -> str:
     """
     Generate a new unique session ID.
     """
-    return str(uuid.uuid4())
+    return os.urandom(16).hex()
 
 def get_session_id(session_id: Optional[str] = Cookie(None)) -> str:
     """
@@ -17,11 +28,81 @@ def get_session_id(session_id: Optional[str] = Cookie(None)) -> str:
             status_code=401,
             detail="Session ID is required. Please refresh the page to start a new session."
         )
-    try:
-        uuid.UUID(session_id)
-    except ValueError:
+    if not _SESSION_ID_RE.match(session_id):
         raise HTTPException(
             status_code=401,
             detail="Invalid session ID. Please refresh the page to start a new session."
         )
     return session_id
+
+
+class PureASGISessionMiddleware:
+    """
+    Signed-cookie session middleware written as a plain ASGI app.
+    
+    The cookie format matches Starlette's SessionMiddleware (base64 JSON signed with
+    itsdangerous), so existing sessions stay valid. The cookie is only re-issued
+    when the session was changed during the request.
+    """
+    
+    def __init__(
+        self,
+        app,
+        secret_key: str,
+        session_cookie: str = "session",
+        max_age: Optional[int] = 14 * 24 * 60 * 60,
+        path: str = "/",
+        same_site: str = "lax",
+        https_only: bool = False,
+    ) -> None:
+        self.app = app
+        self.signer = itsdangerous.TimestampSigner(str(secret_key))
+        self.cookie_prefix = f"{session_cookie}=".encode("latin-1")
+        self.session_cookie = session_cookie
+        self.max_age = max_age
+        self.path = path
+        self.security_flags = "httponly; samesite=" + same_site
+        if https_only:
+            self.security_flags += "; secure"
+    
+    def _load_session(self, scope) -> dict:
+        """Decode the session cookie from the raw request headers."""
+        for name, value in scope["headers"]:
+            if name != b"cookie":
+                continue
+            for cookie in value.split(b";"):
+                cookie = cookie.strip()
+                if not cookie.startswith(self.cookie_prefix):
+                    continue
+                try:
+                    data = self.signer.unsign(cookie[len(self.cookie_prefix):], max_age=self.max_age)
+                    session = orjson.loads(b64decode(data))
+                except (BadSignature, ValueError):
+                    return {}
+                return session if isinstance(session, dict) else {}
+        return {}
+    
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        
+        initial_session = self._load_session(scope)
+        scope["session"] = dict(initial_session)
+        
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start" and scope["session"] != initial_session:
+                if scope["session"]:
+                    data = self.signer.sign(b64encode(orjson.dumps(scope["session"]))).decode("utf-8")
+                    max_age = f"Max-Age={self.max_age}; " if self.max_age else ""
+                    header_value = f"{self.session_cookie}={data}; path={self.path}; {max_age}{self.security_flags}"
+                else:
+                    # The session has been cleared
+                    header_value = (
+                        f"{self.session_cookie}=null; path={self.path}; "
+                        f"expires=Thu, 01 Jan 1970 00:00:00 GMT; {self.security_flags}"
+                    )
+                message["headers"] = [*message.get("headers", ()), (b"set-cookie", header_value.encode("latin-1"))]
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
@@ -1,8 +1,266 @@
 import os
-import json
-from typing import Dict, Any, List
+import atexit
+import sqlite3
+import threading
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
-import traceback
+from pathlib import Path
+import logging
+from collections import OrderedDict
+
+import msgspec
+import orjson
+import zstandard
+
+# Tracebacks are only formatted when DEBUG logging is enabled
+logger = logging.getLogger(__name__)
+
+# Evaluation history: a single SQLite database, one row per evaluation holding the record
+# msgpack-encoded and zstd-compressed
+SESSIONS_DB = Path("data/sessions.db")
+SESSIONS_DB.parent.mkdir(parents=True, exist_ok=True)
+
+# Old one-JSON-file-per-evaluation storage (data/sessions/<session_id>/evaluation_*.json),
+# imported into the database on startup
+LEGACY_SESSIONS_DIR = Path("data/sessions")
+
+_ENCODER = msgspec.msgpack.Encoder()
+_DECODER = msgspec.msgpack.Decoder()
+
+class ResumeRecord(msgspec.Struct, array_like=True, tag=1):
+    """Envelope the resume endpoint saves."""
+    mode: Any
+    resume_text: Any
+    job_description: Any
+    filename: Any
+    evaluation: Any
+    timestamp: Any
+
+class InterviewRecord(msgspec.Struct, array_like=True, tag=2):
+    """Envelope the interview endpoint saves."""
+    mode: Any
+    question: Any
+    answer: Any
+    job_description: Any
+    job_role: Any
+    evaluation: Any
+    timestamp: Any
+
+# Records whose keys are exactly one of these envelopes are stored as a msgpack array,
+# [tag, *values in field order], so field names aren't stored with every record; any
+# other record is stored as a plain map. Stored rows are decoded by position: never
+# reorder, rename, add or remove fields of an existing envelope - add a new one with a
+# new tag instead.
+_RECORD_LAYOUTS = {frozenset(cls.__struct_fields__): cls for cls in (ResumeRecord, InterviewRecord)}
+_RECORD_DECODER = msgspec.msgpack.Decoder(Union[ResumeRecord, InterviewRecord])
+
+def _decode_record(payload: bytes) -> Dict[str, Any]:
+    """Decode a record stored by _encode_record into a dict."""
+    # msgpack arrays start with a fixarray (0x90-0x9f), array16 (0xdc) or array32 (0xdd) marker
+    first = payload[0]
+    if 0x90 <= first <= 0x9f or first in (0xdc, 0xdd):
+        return msgspec.structs.asdict(_RECORD_DECODER.decode(payload))
+    return _DECODER.decode(payload)
+
+def _encode_record(evaluation_data: Dict[str, Any]) -> bytes:
+    """Encode a record as an envelope array if its keys match one exactly, else as a plain map."""
+    layout = _RECORD_LAYOUTS.get(frozenset(evaluation_data))
+    if layout is not None:
+        payload = _ENCODER.encode(layout(**evaluation_data))
+        # Round-trip check: only keep the compact form if it reads back as the same record
+        if _decode_record(payload) == evaluation_data:
+            return payload
+    return _ENCODER.encode(evaluation_data)
+
+# Compression contexts aren't safe for concurrent use; they are only used while holding _conn_lock
+ZSTD_LEVEL = 3
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_CCTX = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+_DCTX = zstandard.ZstdDecompressor()
+
+# Reads go through a memory map of the database file up to this size, instead of read() copies
+SESSIONS_DB_MMAP_SIZE = 256 * 1024 * 1024
+
+_INSERT_EVALUATION_SQL = "INSERT INTO evaluations (session_id, ts, payload) VALUES (?, ?, ?)"
+# Imported rows remember their legacy file, so importing it again is a no-op
+_IMPORT_EVALUATION_SQL = "INSERT OR IGNORE INTO evaluations (session_id, ts, payload, legacy_file) VALUES (?, ?, ?, ?)"
+
+def _connect() -> sqlite3.Connection:
+    """Open the history database and make sure the schema exists."""
+    conn = sqlite3.connect(SESSIONS_DB, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA mmap_size={SESSIONS_DB_MMAP_SIZE}")
+    # Row IDs follow insertion order (timestamps can repeat), so a session's history is one index range scan
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS evaluations (
+            id INTEGER PRIMARY KEY,
+            session_id TEXT NOT NULL,
+            ts TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            legacy_file TEXT UNIQUE
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_evaluations_session ON evaluations (session_id, id)")
+    conn.commit()
+    return conn
+
+# One shared connection; it is used from worker threads, so serialize access to it.
+# Buffered rows are taken while holding it too, so batches are inserted in order.
+_conn = _connect()
+_conn_lock = threading.Lock()
+
+# Saved records are buffered and inserted in batches, one transaction each: after FLUSH_INTERVAL,
+# as soon as FLUSH_MAX_RECORDS / FLUSH_MAX_BYTES are pending, before history is read, and at exit
+FLUSH_INTERVAL = 0.5  # seconds
+FLUSH_MAX_RECORDS = 16
+FLUSH_MAX_BYTES = 64 * 1024
+
+_pending: List[Tuple[str, str, bytes]] = []
+_pending_bytes = 0
+_pending_lock = threading.Lock()
+_flush_timer: Optional[threading.Timer] = None
+
+# Parsed history per session, reused until the session gets a new row
+HISTORY_CACHE_SIZE = 1024
+_history_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_history_cache_lock = threading.Lock()
+
+def _compress_rows(rows: List[Tuple[str, str, bytes]]) -> Iterator[Tuple[str, str, bytes]]:
+    """Compress the payloads of (session_id, ts, payload) rows for insertion."""
+    return ((session_id, ts, _CCTX.compress(payload)) for session_id, ts, payload in rows)
+
+def _decompress_payload(payload: bytes) -> bytes:
+    """Return a stored payload's msgpack bytes; rows written before compression are stored as-is."""
+    return _DCTX.decompress(payload) if payload[:4] == _ZSTD_MAGIC else payload
+
+def _flush() -> None:
+    """Insert all buffered records in one transaction."""
+    global _pending, _pending_bytes
+    with _conn_lock:
+        with _pending_lock:
+            rows, _pending, _pending_bytes = _pending, [], 0
+        if not rows:
+            return
+        try:
+            with _conn:
+                _conn.executemany(_INSERT_EVALUATION_SQL, _compress_rows(rows))
+        except Exception:
+            # Put the rows back in front of anything buffered since, so nothing is lost
+            with _pending_lock:
+                _pending[:0] = rows
+                _pending_bytes += sum(len(payload) for _, _, payload in rows)
+            raise
+    
+    with _history_cache_lock:
+        for session_id in {session_id for session_id, _, _ in rows}:
+            _history_cache.pop(session_id, None)
+
+def _flush_pending() -> None:
+    """Flush the buffer from the timer or at exit, logging failures instead of raising."""
+    global _flush_timer
+    with _pending_lock:
+        _flush_timer = None
+    try:
+        _flush()
+    except Exception as e:
+        logger.error("Error flushing evaluation history: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+
+atexit.register(_flush_pending)
+
+def _read_legacy_session(session_dir: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Read a legacy session directory's (file name, record) pairs, oldest first. File names
+    embed a %Y%m%d_%H%M%S timestamp, so name order is time order. Files that can't be
+    read or don't hold a record are logged and skipped.
+    """
+    with os.scandir(session_dir) as entries:
+        legacy_files = sorted(
+            (entry.name, entry.path)
+            for entry in entries
+            if entry.name.startswith('evaluation_')
+            and entry.name.endswith('.json')
+            and entry.is_file(follow_symlinks=False)
+        )
+    
+    records = []
+    for filename, filepath in legacy_files:
+        try:
+            with open(filepath, 'rb') as file:
+                record = orjson.loads(file.read())
+        except Exception as e:
+            logger.warning("Error reading %s: %s", filepath, e)
+            continue
+        if not isinstance(record, dict):
+            logger.warning("Skipping %s: not an evaluation record", filepath)
+            continue
+        records.append((filename, record))
+    return records
+
+def _read_legacy_rows() -> List[Tuple[str, str, bytes, str]]:
+    """Read every legacy session as (session_id, ts, payload, legacy_file) rows to import."""
+    rows = []
+    with os.scandir(LEGACY_SESSIONS_DIR) as entries:
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            try:
+                session_rows = [
+                    (entry.name, str(record.get("timestamp", "")), _encode_record(record), f"{entry.name}/{filename}")
+                    for filename, record in _read_legacy_session(entry.path)
+                ]
+            except Exception as e:
+                logger.warning("Error reading legacy history in %s: %s", entry.path, e)
+                continue
+            rows.extend(session_rows)
+    return rows
+
+def migrate_session_files() -> int:
+    """
+    Import history from the legacy data/sessions/<session_id>/ directories into the database.
+    
+    Records already imported (same legacy file) are skipped, so an interrupted import
+    can't duplicate history, and the import holds the database write lock, so only one
+    of several workers starting at once does it. Afterwards the legacy directory is
+    renamed to data/sessions.migrated so it isn't read again.
+    
+    Returns:
+        Number of evaluations imported
+    """
+    if not LEGACY_SESSIONS_DIR.is_dir():
+        return 0
+    
+    with _conn_lock, _conn:
+        try:
+            _conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            logger.warning("Skipping history import, another worker is running it: %s", e)
+            return 0
+        try:
+            rows = _read_legacy_rows()
+        except FileNotFoundError:
+            # Another worker finished the import while we waited for the lock
+            return 0
+        imported = _conn.executemany(
+            _IMPORT_EVALUATION_SQL,
+            ((session_id, ts, _CCTX.compress(payload), legacy_file) for session_id, ts, payload, legacy_file in rows),
+        ).rowcount
+    
+    target = LEGACY_SESSIONS_DIR.with_name("sessions.migrated")
+    if target.exists():
+        target = target.with_name(f"sessions.migrated.{datetime.now():%Y%m%d_%H%M%S}")
+    try:
+        LEGACY_SESSIONS_DIR.rename(target)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        # Safe to retry on the next start; already imported files are skipped
+        logger.warning("Could not rename %s: %s", LEGACY_SESSIONS_DIR, e)
+    return imported
+
+migrate_session_files()
 
 def save_evaluation(session_id: str, evaluation_data: Dict[str, Any]) -> bool:
     """
@@ -11,71 +269,137 @@ def save_evaluation(session_id: str, evaluation_data: Dict[str, Any]) -> bool:
     Args:
         session_id: User's session ID
         evaluation_data: Dictionary containing evaluation details
-        
+    
     Returns:
         bool: True if save was successful, False otherwise
     """
+    global _flush_timer, _pending_bytes
     try:
-        # Create directory path for this session if it doesn't exist
-        session_dir = os.path.join("data", "sessions", session_id)
-        os.makedirs(session_dir, exist_ok=True)
-        
-        # Generate a filename based on timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"evaluation_{timestamp}.json"
-        filepath = os.path.join(session_dir, filename)
-        
         # Add timestamp if not present
         if "timestamp" not in evaluation_data:
             evaluation_data["timestamp"] = datetime.now().isoformat()
-            
-        # Write the evaluation data to file
-        with open(filepath, 'w', encoding='utf-8') as file:
-            json.dump(evaluation_data, file, ensure_ascii=False, indent=2)
-            
+        
+        # Buffer the record; it is inserted with the next batch
+        payload = _encode_record(evaluation_data)
+        with _pending_lock:
+            _pending.append((session_id, str(evaluation_data["timestamp"]), payload))
+            _pending_bytes += len(payload)
+            flush_now = len(_pending) >= FLUSH_MAX_RECORDS or _pending_bytes >= FLUSH_MAX_BYTES
+            if not flush_now and _flush_timer is None:
+                _flush_timer = threading.Timer(FLUSH_INTERVAL, _flush_pending)
+                _flush_timer.daemon = True
+                _flush_timer.start()
+        
+        if flush_now:
+            _flush()
+        
         return True
     except Exception as e:
-        print(f"Error saving evaluation: {str(e)}")
-        traceback.print_exc()
+        logger.error("Error saving evaluation: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
         return False
 
-def get_user_history(session_id: str) -> List[Dict[str, Any]]:
+def _cached_history(session_id: str) -> Tuple[Optional[int], Optional[List[Dict[str, Any]]]]:
+    """
+    Return the session's newest row ID (None if it has no history) and its cached
+    history, or None if that isn't cached or is out of date.
     """
-    Retrieve all past evaluations for a user.
+    # Make sure records still sitting in the buffer are included
+    _flush()
+    
+    with _conn_lock:
+        (latest_id,) = _conn.execute(
+            "SELECT MAX(id) FROM evaluations WHERE session_id = ?", (session_id,)
+        ).fetchone()
+    if latest_id is None:
+        return None, None
+    
+    # Reuse the parsed history unless the session has newer rows (e.g. from another worker)
+    with _history_cache_lock:
+        cached = _history_cache.get(session_id)
+        if cached is not None and cached[0] == latest_id:
+            _history_cache.move_to_end(session_id)
+            return latest_id, cached[1]
+    return latest_id, None
+
+def _read_rows(session_id: str, before_id: int, limit: int = -1, offset: int = 0) -> List[Tuple[int, bytes]]:
+    """Read (id, msgpack payload) rows of a session older than before_id, newest first, along the (session_id, id) index."""
+    with _conn_lock:
+        rows = _conn.execute(
+            "SELECT id, payload FROM evaluations WHERE session_id = ? AND id < ? ORDER BY id DESC LIMIT ? OFFSET ?",
+            (session_id, before_id, limit, offset),
+        ).fetchall()
+        return [(row_id, _decompress_payload(payload)) for row_id, payload in rows]
+
+def _load_history(session_id: str, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    Return a session's history, newest first. With no limit this is the full, cached
+    list itself (don't modify it); otherwise only the requested page.
+    """
+    latest_id, history = _cached_history(session_id)
+    if latest_id is None:
+        return []
+    if history is not None:
+        return history if limit is None else history[offset:offset + limit]
+    
+    # A page is read on its own and not cached
+    if limit is not None:
+        return [_decode_record(payload) for _, payload in _read_rows(session_id, latest_id + 1, limit, offset)]
+    
+    history = [_decode_record(payload) for _, payload in _read_rows(session_id, latest_id + 1)]
+    
+    with _history_cache_lock:
+        _history_cache[session_id] = (latest_id, history)
+        if len(_history_cache) > HISTORY_CACHE_SIZE:
+            _history_cache.popitem(last=False)
+    
+    return history
+
+# Rows iter_user_history reads from the database at a time
+HISTORY_ITER_BATCH = 16
+
+def iter_user_history(session_id: str) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over past evaluations for a user, newest first.
+    
+    Unless the session's history is already cached, rows are read and decoded in
+    batches of HISTORY_ITER_BATCH as the iterator advances, so taking the latest few
+    (e.g. with itertools.islice) only reads about that many.
+    """
+    try:
+        latest_id, history = _cached_history(session_id)
+    except Exception as e:
+        logger.error("Error retrieving history: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+        return
+    if history is not None:
+        yield from history
+        return
+    
+    before_id = latest_id + 1 if latest_id is not None else None
+    while before_id is not None:
+        try:
+            rows = _read_rows(session_id, before_id, HISTORY_ITER_BATCH)
+        except Exception as e:
+            logger.error("Error retrieving history: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+            return
+        for _, payload in rows:
+            yield _decode_record(payload)
+        before_id = rows[-1][0] if len(rows) == HISTORY_ITER_BATCH else None
+
+def get_user_history(session_id: str, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    Retrieve past evaluations for a user, newest first.
     
     Args:
         session_id: User's session ID
-        
+        limit: Maximum number of evaluations to return (all if None)
+        offset: Number of newest evaluations to skip
+    
     Returns:
         List of evaluation dictionaries
     """
-    history = []
-    
     try:
-        # Get path to the session directory
-        session_dir = os.path.join("data", "sessions", session_id)
-        
-        # If directory doesn't exist, return empty history
-        if not os.path.exists(session_dir):
-            return []
-            
-        # Iterate through all JSON files in the directory
-        for filename in os.listdir(session_dir):
-            if filename.endswith('.json'):
-                try:
-                    filepath = os.path.join(session_dir, filename)
-                    with open(filepath, 'r', encoding='utf-8') as file:
-                        evaluation_data = json.load(file)
-                        history.append(evaluation_data)
-                except Exception as e:
-                    print(f"Error reading {filename}: {str(e)}")
-                    continue
-                    
-        # Sort by timestamp, newest first
-        history.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-        
-        return history
+        history = _load_history(session_id, limit, offset)
+        return history[offset:] if limit is None else history
     except Exception as e:
-        print(f"Error retrieving history: {str(e)}")
-        traceback.print_exc()
-        return []
\ No newline at end of file
+        logger.error("Error retrieving history: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+        return []